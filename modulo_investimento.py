@@ -1,6 +1,9 @@
-from dataclasses import dataclass, field
-from typing import List, Literal, Dict, Any, Tuple, Optional
-import math
+from collections.abc import MutableMapping
+from dataclasses import dataclass, field, InitVar
+from typing import Literal, Dict, Any, Tuple, Optional, Callable, Iterator
+from functools import partial
+
+import numpy as np
 
 try:
     import pandas as pd  # opzionale: serve solo per dataframe()
@@ -9,31 +12,232 @@ except Exception:
 
 LoanMode = Literal["rata_fissa", "quota_capitale_fissa"]
 
+# serie del piano di ammortamento per periodo (chiavi del dict di _ammortamento)
+_CHIAVI_PIANO = ("interesse", "capitale", "rata", "residuo")
+
 
-def _to_decimal_rate(x: float) -> float:
+def _amm_rata_fissa(P: float, r: float, interessi, capitale, rata, residuo) -> None:
+    """
+    Piano alla francese: riempie i buffer preallocati (lunghi n periodi)
+    di interessi, capitale, rata e residuo, senza array intermedi.
+    """
+    n = interessi.size
+    if r == 0:
+        rata_costante = P / n
+        interessi[:] = 0.0
+    else:
+        montante = (1.0 + r)**n  # (1+r)^n, calcolato una sola volta
+        rata_costante = P * r * montante / (montante - 1.0)
+        # saldo prima del periodo k = valore attuale delle n-k rate residue
+        np.subtract(np.arange(n), n, interessi)
+        np.power(1.0 + r, interessi, interessi)
+        np.subtract(1.0, interessi, interessi)
+        np.multiply(interessi, rata_costante, interessi)
+    np.subtract(rata_costante, interessi, capitale)
+    np.add(interessi, capitale, rata)
+    residuo[:] = np.cumsum(capitale)
+    np.subtract(P, residuo, residuo)
+    np.maximum(residuo, 0.0, residuo)
+
+
+def _amm_quota_cap(P: float, r: float, interessi, capitale, rata, residuo) -> None:
     """
-    Se un tasso è passato come percentuale (es. 5, 5.0, 5%),
-    lo converte in decimale. Se è già decimale (es. 0.05) lo lascia invariato.
+    Piano a quota capitale costante: riempie i buffer preallocati (lunghi n periodi)
+    di interessi, capitale, rata e residuo, senza array intermedi.
+    """
+    n = interessi.size
+    quota_capitale = P / n
+    capitale[:] = quota_capitale
+    # residuo contiene prima il saldo a inizio periodo, poi quello dopo il pagamento
+    np.multiply(np.arange(n), quota_capitale, residuo)
+    np.subtract(P, residuo, residuo)
+    np.multiply(residuo, r, interessi)
+    np.add(capitale, interessi, rata)
+    np.subtract(residuo, quota_capitale, residuo)
+    np.maximum(residuo, 0.0, residuo)
+
+
+def _van_scenario(prezzo: float, quota_mutuo: float, tasso: float, affitto: float, aliquota: float,
+                  durata_prestito: int, durata_progetto: int, tasso_att: float,
+                  pagamenti_per_anno: int, quota_capitale_fissa: bool) -> float:
+    """
+    VAN di un singolo scenario, con la stessa logica di calcola_flussi + VAN
+    ma su scalari (tassi già decimali): è il corpo del kernel di van_batch.
+    Replica a mano piano di ammortamento, mappatura sui mesi, tasse e sconto:
+    ogni modifica a quei calcoli va riportata anche qui.
+    """
+    n = durata_prestito * pagamenti_per_anno
+    r = tasso / pagamenti_per_anno
+    P = prezzo * quota_mutuo
+    mesi_fin = durata_prestito * 12
+    mesi = durata_progetto * 12
+
+    # rate del mutuo sulla timeline mensile del progetto
+    rate_mensili = np.zeros(mesi)
+    quota_capitale = P / n
+    if r == 0:
+        rata_costante = quota_capitale
+    else:
+        montante = (1.0 + r)**n
+        rata_costante = P * r * montante / (montante - 1.0)
+    for k in range(n):
+        if quota_capitale_fissa:
+            rata_k = quota_capitale + (P - k * quota_capitale) * r
+        else:
+            rata_k = rata_costante
+        m = min((k * 12) // pagamenti_per_anno, mesi_fin - 1)
+        if m < mesi:
+            rate_mensili[m] += rata_k
+
+    # flussi scontati mese per mese, tasse sull'utile annuale a fine anno
+    sconto_mese = 1.0 / (1.0 + tasso_att)**(1.0 / 12.0)
+    sconto = 1.0
+    van = -prezzo * (1.0 - quota_mutuo)
+    utile_anno = 0.0
+    for m in range(mesi):
+        sconto *= sconto_mese
+        cf = affitto - rate_mensili[m]
+        utile_anno += cf
+        if m % 12 == 11 or m == mesi - 1:
+            cf -= max(0.0, utile_anno) * aliquota
+            utile_anno = 0.0
+        van += cf * sconto
+    return van
+
+
+def _van_batch_kernel(prezzo, quota_mutuo, tasso, affitto, aliquota, durata_prestito,
+                      durata_progetto, tasso_att, pagamenti_per_anno, quota_capitale_fissa, out):
+    out[0] = _van_scenario_jit(prezzo, quota_mutuo, tasso, affitto, aliquota, durata_prestito,
+                               durata_progetto, tasso_att, pagamenti_per_anno, quota_capitale_fissa)
+
+
+# compilati da _gufunc_van_batch al primo utilizzo (il gufunc è False se manca numba)
+_van_scenario_jit = None
+_van_batch_gufunc = None
+
+
+def _gufunc_van_batch():
     """
-    if isinstance(x, (int, float)):
-        return x/100.0 if x > 1 else float(x)
-    # fallback super semplice per stringhe tipo "5%" o "5"
+    Ufunc generalizzata di van_batch (broadcasting sugli input, scenari in parallelo
+    sui core), compilata al primo utilizzo e non all'import: numba è opzionale e
+    viene importato solo qui, così l'import del modulo resta leggero.
+    None se numba non è disponibile.
+    """
+    global _van_scenario_jit, _van_batch_gufunc
+    if _van_batch_gufunc is None:
+        try:
+            from numba import njit, guvectorize  # opzionale: serve solo per van_batch
+        except Exception:
+            _van_batch_gufunc = False
+            return None
+        _van_scenario_jit = njit(cache=True, fastmath=True)(_van_scenario)
+        _van_batch_gufunc = guvectorize(
+            ["void(float64, float64, float64, float64, float64, int64, int64, float64, int64, boolean, float64[:])"],
+            "(),(),(),(),(),(),(),(),(),()->()",
+            nopython=True,
+            target="parallel",
+            cache=True,
+        )(_van_batch_kernel)
+    return _van_batch_gufunc or None
+
+
+def _to_decimal_rate(nome: str, decimale: Optional[float], percentuale: Optional[float],
+                     default: Optional[float] = None, massimo: Optional[float] = None) -> float:
+    """
+    Normalizza un tasso passato in UNA delle due unità esplicite:
+    `decimale` (es. 0.05) oppure `percentuale` (es. 5 per 5%).
+    Nessuna euristica sul valore: 0.5 è sempre 50%, 1 è sempre 100%.
+    Una stringa con il suffisso "%" (es. "5%") è esplicita e vale come percentuale
+    in entrambi i campi.
+    Se mancano entrambi si usa `default` (se None, è un errore).
+    Con `massimo` un tasso decimale più alto è rifiutato (es. aliquota 21 invece di 0.21).
+    Accetta anche array di tassi (per van_batch): in quel caso restituisce un array.
+    """
+    if decimale is not None and percentuale is not None:
+        raise ValueError(f"{nome} e {nome}_pct sono alternativi: specificarne solo uno")
+    if decimale is None and percentuale is None:
+        if default is None:
+            raise ValueError(f"{nome}: specificare il tasso in decimale o con {nome}_pct")
+        return float(default)
+
+    valore = decimale if percentuale is None else percentuale
+    in_percentuale = percentuale is not None
+    numero = valore
+    if isinstance(valore, str) and valore.strip().endswith("%"):
+        numero = valore.strip()[:-1]
+        in_percentuale = True
     try:
-        s = str(x).strip().replace("%", "")
-        v = float(s)
-        return v/100.0 if v > 1 else v
-    except Exception:
-        raise ValueError(f"Impossibile interpretare il tasso: {x!r}")
+        tasso = np.asarray(numero, dtype=np.float64) / (100.0 if in_percentuale else 1.0)
+    except (TypeError, ValueError):
+        raise ValueError(f"Impossibile interpretare il tasso {nome}: {valore!r}") from None
+    if massimo is not None and np.any(tasso > massimo):
+        campo = nome if percentuale is None else f"{nome}_pct"
+        valori = f"vale {valore!r}" if tasso.ndim == 0 else "contiene valori"
+        if not in_percentuale:
+            raise ValueError(
+                f"{campo} {valori} oltre il massimo di {massimo:g} in decimale: "
+                f"per passare una percentuale usare {nome}_pct"
+            )
+        raise ValueError(f"{campo} {valori} oltre il massimo di {massimo:.0%}")
+    return float(tasso) if tasso.ndim == 0 else tasso
+
+
+class _DettagliLazy(MutableMapping):
+    """
+    Dizionario dei dettagli in cui alcune serie vengono calcolate solo al primo
+    accesso. `calcoli` associa a ogni chiave pigra una funzione senza argomenti
+    che restituisce un dict di serie (più chiavi possono condividere la stessa
+    funzione: vengono materializzate insieme). Le chiavi di `valori` e `calcoli`
+    sono sempre disgiunte.
+    """
+
+    def __init__(self, valori: Dict[str, Any], calcoli: Dict[str, Callable[[], Dict[str, Any]]]):
+        self._valori = dict(valori)
+        self._calcoli = dict(calcoli)
+
+    def __getitem__(self, chiave: str) -> Any:
+        if chiave in self._calcoli:
+            calcolo = self._calcoli[chiave]
+            for k, valore in calcolo().items():
+                # solo le chiavi ancora in attesa di questo calcolo (non rimosse/sovrascritte)
+                if self._calcoli.get(k) is calcolo:
+                    del self._calcoli[k]
+                    self._valori[k] = valore
+        return self._valori[chiave]
+
+    def __setitem__(self, chiave: str, valore: Any) -> None:
+        self._calcoli.pop(chiave, None)
+        self._valori[chiave] = valore
+
+    def __delitem__(self, chiave: str) -> None:
+        if chiave in self._calcoli:
+            del self._calcoli[chiave]
+        else:
+            del self._valori[chiave]
 
+    def __contains__(self, chiave: object) -> bool:
+        # senza materializzare le serie pigre
+        return chiave in self._valori or chiave in self._calcoli
 
-@dataclass
+    def __iter__(self) -> Iterator[str]:
+        # copia delle chiavi: leggere i valori durante l'iterazione materializza le serie pigre
+        return iter([*self._valori, *self._calcoli])
+
+    def __len__(self) -> int:
+        return len(self._valori) + len(self._calcoli)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+@dataclass(slots=True)
 class ProgettoImmobiliare:
     # INPUT DI BASE
     prezzo_appartamento: float
     quota_mutuo: float  # percentuale dell'investimento coperta da mutuo (es. 0.8)
-    tasso_annuo_mutuo: float  # in decimale (es. 0.04). Se >1, viene interpretato come %
+    tasso_annuo_mutuo: Optional[float]  # in decimale (es. 0.04); None se si usa tasso_annuo_mutuo_pct
     affitto_mensile_stimato: float
-    aliquota_tasse: float  # in decimale (es. 0.26). Se >1, viene interpretato come %
+    aliquota_tasse: Optional[float]  # in decimale (es. 0.26); None se si usa aliquota_tasse_pct
     durata_prestito_anni: int
     # NUOVO: vita del progetto (può essere diversa dalla durata del finanziamento)
     durata_progetto_anni: Optional[int] = None
@@ -41,17 +245,31 @@ class ProgettoImmobiliare:
     # PARAMETRI TECNICI
     modalita_prestito: LoanMode = "rata_fissa"
     pagamenti_per_anno: int = 12
-    tasso_attualizzazione_annuo: float = 0.0  # per VAN. In decimale; se >1, interpretato come %
+    tasso_attualizzazione_annuo: Optional[float] = None  # per VAN, in decimale (default 0)
 
-    # campi calcolati
-    cashflow_mensile: List[float] = field(default_factory=list)
-    dettagli_prestito: Dict[str, Any] = field(default_factory=dict)
+    # alternative in percentuale (es. 4 per 4%), esclusive rispetto al campo decimale
+    tasso_annuo_mutuo_pct: InitVar[Optional[float]] = None
+    aliquota_tasse_pct: InitVar[Optional[float]] = None
+    tasso_attualizzazione_annuo_pct: InitVar[Optional[float]] = None
 
-    def __post_init__(self):
-        # normalizza tassi (accetta sia % che decimali)
-        self.tasso_annuo_mutuo = _to_decimal_rate(self.tasso_annuo_mutuo)
-        self.aliquota_tasse = _to_decimal_rate(self.aliquota_tasse)
-        self.tasso_attualizzazione_annuo = _to_decimal_rate(self.tasso_attualizzazione_annuo)
+    # campi calcolati
+    # (esclusi dal confronto: derivano dagli input e contengono array NumPy)
+    cashflow_mensile: np.ndarray = field(default_factory=lambda: np.zeros(0), compare=False)
+    dettagli_prestito: MutableMapping = field(default_factory=dict, compare=False)
+    # input con cui sono stati calcolati i campi sopra (memoizzazione di calcola_flussi)
+    _chiave_cache: Optional[Tuple[Any, ...]] = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self, tasso_annuo_mutuo_pct, aliquota_tasse_pct, tasso_attualizzazione_annuo_pct):
+        # normalizza i tassi una volta sola: da qui in poi sono sempre decimali
+        # tassi oltre il 100% non hanno senso: quasi sempre è una percentuale
+        # passata nel campo decimale (es. 3 invece di 0.03)
+        self.tasso_annuo_mutuo = _to_decimal_rate(
+            "tasso_annuo_mutuo", self.tasso_annuo_mutuo, tasso_annuo_mutuo_pct, massimo=1.0)
+        self.aliquota_tasse = _to_decimal_rate(
+            "aliquota_tasse", self.aliquota_tasse, aliquota_tasse_pct, massimo=1.0)
+        self.tasso_attualizzazione_annuo = _to_decimal_rate(
+            "tasso_attualizzazione_annuo", self.tasso_attualizzazione_annuo,
+            tasso_attualizzazione_annuo_pct, default=0.0, massimo=1.0)
 
         if not (0 <= self.quota_mutuo <= 1):
             # se l'utente passa 80 intende 80% → 0.8
@@ -76,160 +294,235 @@ class ProgettoImmobiliare:
         return self.prezzo_appartamento * (1 - self.quota_mutuo)
 
     # --- CALCOLI FINANZIAMENTO ---
-    def _ammortamento(self) -> Dict[str, List[float]]:
+    def _ammortamento(self, out: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
         """
-        Restituisce dizionario con liste per ciascun periodo di pagamento del mutuo:
+        Restituisce dizionario con array per ciascun periodo di pagamento del mutuo:
         'interesse', 'capitale', 'rata', 'residuo'.
         Periodo = 1/pagamenti_per_anno (es. mensile se 12).
-        La lunghezza di queste liste è n = durata_prestito_anni * pagamenti_per_anno.
+        La lunghezza di questi array è n = durata_prestito_anni * pagamenti_per_anno.
+        Il piano è calcolato in forma chiusa (niente loop sui periodi).
+        Con `out` (dict con le stesse chiavi e array float64 lunghi n) il piano viene
+        scritto in quei buffer, che vengono restituiti: chi valuta molti scenari con la
+        stessa durata li alloca una volta sola e li riusa (es. van_batch senza numba).
         """
         n = self.durata_prestito_anni * self.pagamenti_per_anno
         r = self.tasso_annuo_mutuo / self.pagamenti_per_anno  # tasso per periodo
-        P = self.ammontare_mutuo
-
-        interessi: List[float] = []
-        capitale: List[float] = []
-        rata: List[float] = []
-        residuo: List[float] = []
-
-        saldo = P
+        P = float(self.ammontare_mutuo)
 
         if self.modalita_prestito == "rata_fissa":
-            # rata annuità
-            if r == 0:
-                rata_costante = P / n
-            else:
-                rata_costante = P * (r * (1 + r)**n) / ((1 + r)**n - 1)
-
-            for _ in range(n):
-                interesse_k = saldo * r
-                capitale_k = rata_costante - interesse_k
-                saldo = max(0.0, saldo - capitale_k)
-
-                interessi.append(interesse_k)
-                capitale.append(capitale_k)
-                rata.append(interesse_k + capitale_k)
-                residuo.append(saldo)
-
+            kernel = _amm_rata_fissa
         elif self.modalita_prestito == "quota_capitale_fissa":
-            # quota capitale costante
-            quota_capitale = P / n
-            for _ in range(n):
-                interesse_k = saldo * r
-                pagamento_k = quota_capitale + interesse_k
-                saldo = max(0.0, saldo - quota_capitale)
-
-                interessi.append(interesse_k)
-                capitale.append(quota_capitale)
-                rata.append(pagamento_k)
-                residuo.append(saldo)
+            kernel = _amm_quota_cap
         else:
             raise ValueError(f"Modalità prestito non riconosciuta: {self.modalita_prestito}")
 
-        return {
-            "interesse": interessi,
-            "capitale": capitale,
-            "rata": rata,
-            "residuo": residuo,
-        }
+        if out is None:
+            out = {k: np.empty(n, dtype=np.float64) for k in _CHIAVI_PIANO}
+        else:
+            for k in _CHIAVI_PIANO:
+                buf = out.get(k)
+                if not (isinstance(buf, np.ndarray) and buf.dtype == np.float64 and buf.shape == (n,)):
+                    raise ValueError(f"out[{k!r}] deve essere un array float64 di {n} elementi")
+
+        kernel(P, float(r), out["interesse"], out["capitale"], out["rata"], out["residuo"])
+        return out
+
+    # Le funzioni di allineamento alla timeline mensile dipendono solo da
+    # pagamenti_per_anno e durata_prestito_anni, passati esplicitamente: così le
+    # serie pigre di calcola_flussi possono fissarli senza copiare l'istanza.
+    @staticmethod
+    def _indici_mese_periodi(n_periodi: int, pagamenti_per_anno: int, durata_prestito_anni: int) -> np.ndarray:
+        """
+        Indice del mese (0-based, timeline finanziamento) in cui cade ciascun
+        periodo di pagamento. È lo stesso per tutte le serie del piano.
+        """
+        total_months_fin = durata_prestito_anni * 12
+        k = np.arange(n_periodi, dtype=np.int64)
+        return np.minimum((k * 12) // pagamenti_per_anno, total_months_fin - 1)
 
-    def _mappa_rate_su_mesi(self, rate_per_periodo: List[float], project_months: int) -> List[float]:
+    @staticmethod
+    def _mappa_rate_su_mesi(rate_per_periodo: np.ndarray, project_months: int,
+                            pagamenti_per_anno: int, durata_prestito_anni: int) -> np.ndarray:
         """
         Converte la sequenza delle rate (definite su base 'pagamenti_per_anno') in
         una sequenza mensile lungo tutta la durata del PROGETTO.
         Se il progetto dura di più del prestito, dopo l'ultima rata si hanno zeri.
         Se il progetto dura meno del prestito, le rate in eccesso vengono tagliate.
+        Accetta anche più serie impilate (shape (m, n_periodi) -> (m, project_months)),
+        così da mapparle tutte in un solo passaggio.
         """
-        total_months_fin = self.durata_prestito_anni * 12
-        pag_per_anno = self.pagamenti_per_anno
-        mesi = [0.0] * project_months
-
-        n_periodi = len(rate_per_periodo)
-        for k in range(n_periodi):
-            # indice mese 0-based in timeline finanziamento
-            mese_fin_idx = int(math.floor((k * 12) / pag_per_anno))
-            if mese_fin_idx >= total_months_fin:
-                mese_fin_idx = total_months_fin - 1
-            if 0 <= mese_fin_idx < project_months:
-                mesi[mese_fin_idx] += rate_per_periodo[k]
+        serie = np.asarray(rate_per_periodo, dtype=np.float64)
+        n_periodi = serie.shape[-1]
+        mesi = np.zeros(serie.shape[:-1] + (project_months,))
+        if pagamenti_per_anno == 12:
+            # caso comune: periodo k = mese k, basta troncare/estendere con zeri
+            m = min(n_periodi, project_months)
+            mesi[..., :m] = serie[..., :m]
+            return mesi
+
+        indici_mese = ProgettoImmobiliare._indici_mese_periodi(n_periodi, pagamenti_per_anno, durata_prestito_anni)
+        dentro = (indici_mese >= 0) & (indici_mese < project_months)
+        np.add.at(
+            mesi.reshape(-1, project_months),
+            (slice(None), indici_mese[dentro]),
+            serie.reshape(-1, n_periodi)[:, dentro],
+        )
         return mesi
 
-    def _allinea_serie_ammortamento_mensile(self, serie_per_periodo: List[float], project_months: int) -> List[float]:
+    @staticmethod
+    def _allinea_serie_ammortamento_mensile(serie_per_periodo: np.ndarray, project_months: int,
+                                            pagamenti_per_anno: int, durata_prestito_anni: int) -> np.ndarray:
         """
         Allinea una qualsiasi serie del piano ammortamento (per periodo di pagamento)
         alla timeline MENSILE del progetto, come _mappa_rate_su_mesi.
         """
-        return self._mappa_rate_su_mesi(serie_per_periodo, project_months)
+        return ProgettoImmobiliare._mappa_rate_su_mesi(
+            serie_per_periodo, project_months, pagamenti_per_anno, durata_prestito_anni)
 
-    def _calcola_tasse_annuali(self, cf_mensili_al_lordo_tasse: List[float]) -> List[float]:
+    @staticmethod
+    def _residuo_su_mesi(residuo_per_periodo: np.ndarray, project_months: int,
+                         pagamenti_per_anno: int, durata_prestito_anni: int) -> np.ndarray:
+        """
+        Debito residuo sulla timeline MENSILE del progetto. Il residuo è un saldo,
+        non un flusso: ogni mese riporta il residuo dopo l'ultimo pagamento
+        avvenuto entro quel mese (forward-fill), senza sommare più periodi.
+        Dopo la fine del prestito resta l'ultimo residuo (cioè 0).
+        """
+        serie = np.asarray(residuo_per_periodo, dtype=np.float64)
+        n_periodi = serie.size
+        if pagamenti_per_anno == 12:
+            mesi = np.full(project_months, serie[-1])
+            m = min(n_periodi, project_months)
+            mesi[:m] = serie[:m]
+            return mesi
+
+        indici_mese = ProgettoImmobiliare._indici_mese_periodi(n_periodi, pagamenti_per_anno, durata_prestito_anni)
+        dentro = indici_mese < project_months
+        # ultimo periodo pagato entro ciascun mese (il mese 0 contiene sempre il periodo 0)
+        ultimo_periodo = np.zeros(project_months, dtype=np.int64)
+        np.maximum.at(ultimo_periodo, indici_mese[dentro], np.arange(n_periodi)[dentro])
+        np.maximum.accumulate(ultimo_periodo, out=ultimo_periodo)
+        return serie[ultimo_periodo]
+
+    @staticmethod
+    def _serie_piano_mensili(amm: Dict[str, np.ndarray], project_months: int,
+                             pagamenti_per_anno: int, durata_prestito_anni: int) -> Dict[str, np.ndarray]:
+        """
+        Interessi, capitale e residuo del piano sulla timeline mensile del progetto
+        (le serie pigre dei dettagli di calcola_flussi).
+        """
+        interessi_mensili, capitale_mensile = ProgettoImmobiliare._allinea_serie_ammortamento_mensile(
+            np.stack([amm["interesse"], amm["capitale"]]), project_months,
+            pagamenti_per_anno, durata_prestito_anni)
+        return {
+            "interessi_mensili": interessi_mensili,
+            "capitale_mensile": capitale_mensile,
+            # residuo è un saldo: teniamo l'ultimo valore noto in ogni mese
+            "residuo_mensile": ProgettoImmobiliare._residuo_su_mesi(
+                amm["residuo"], project_months, pagamenti_per_anno, durata_prestito_anni),
+        }
+
+    def _calcola_tasse_annuali(self, cf_mensili_al_lordo_tasse: np.ndarray) -> np.ndarray:
         """
         Calcola le tasse a fine anno applicando l'aliquota al reddito netto
         annuale (somma dei 12 mesi). Se negativo, tasse = 0.
         Le tasse vengono sottratte nel mese di dicembre di ciascun anno.
         La durata considerata è quella del PROGETTO.
         """
-        mesi = len(cf_mensili_al_lordo_tasse)
+        cf = np.asarray(cf_mensili_al_lordo_tasse, dtype=np.float64)
+        mesi = cf.size
+        tasse_mensili = np.zeros(mesi)
         if mesi == 0:
-            return []
-        anni = (mesi + 11) // 12  # arrotonda per eccesso
-        tasse_mensili = [0.0] * mesi
-        for y in range(anni):
-            start = y * 12
-            end = min((y + 1) * 12, mesi)
-            utile_anno = sum(cf_mensili_al_lordo_tasse[start:end])
-            tassa_anno = max(0.0, utile_anno) * self.aliquota_tasse
-            # allocazione a dicembre (mese end-1)
-            tasse_mensili[end - 1] -= tassa_anno
+            return tasse_mensili
+        # completa l'ultimo anno (se parziale) con zeri e somma per riga
+        pad = (-mesi) % 12
+        utile_anni = np.concatenate([cf, np.zeros(pad)]).reshape(-1, 12).sum(axis=1)
+        tasse_anni = np.maximum(0.0, utile_anni) * self.aliquota_tasse
+        # allocazione a dicembre (o all'ultimo mese dell'anno parziale)
+        fine_anno = np.minimum(np.arange(12, mesi + pad + 1, 12), mesi) - 1
+        tasse_mensili[fine_anno] -= tasse_anni
         return tasse_mensili
 
     # --- FLUSSI E METRICHE ---
-    def calcola_flussi(self) -> Tuple[List[float], Dict[str, Any]]:
+    def _chiave_input(self) -> Tuple[Any, ...]:
+        """Tupla degli input da cui dipendono i flussi (non include il tasso di attualizzazione)."""
+        return (
+            self.prezzo_appartamento,
+            self.quota_mutuo,
+            self.tasso_annuo_mutuo,
+            self.affitto_mensile_stimato,
+            self.aliquota_tasse,
+            self.durata_prestito_anni,
+            self.durata_progetto_anni,
+            self.modalita_prestito,
+            self.pagamenti_per_anno,
+        )
+
+    def calcola_flussi(self) -> Tuple[np.ndarray, MutableMapping]:
         """
         Calcola e salva:
         - flusso di cassa mensile del progetto (incluso -equity iniziale al mese 0)
         - dettagli allineati alla frequenza mensile (affitto, rata, interessi, capitale, residuo, tasse)
         Ritorna (cashflow_mensile, dettagli).
+        Se gli input non sono cambiati dall'ultima chiamata, restituisce i risultati salvati.
+        Interessi, capitale e residuo mensili non servono a VAN/riassunto: nei dettagli
+        vengono calcolati solo al primo accesso (es. da dataframe()).
         """
-        amm = self._ammortamento()
+        chiave = self._chiave_input()
+        if chiave == self._chiave_cache and len(self.cashflow_mensile) > 0:
+            return self.cashflow_mensile, self.dettagli_prestito
 
+        self.cashflow_mensile, self.dettagli_prestito = self._flussi(self._ammortamento())
+        self._chiave_cache = chiave
+        return self.cashflow_mensile, self.dettagli_prestito
+
+    def _flussi(self, amm: Dict[str, np.ndarray]) -> Tuple[np.ndarray, MutableMapping]:
+        """
+        Flussi mensili (con -equity al mese 0) e dettagli a partire da un piano di
+        ammortamento già calcolato, senza salvarli sull'istanza.
+        Le serie pigre dei dettagli leggono `amm`: se i suoi buffer vengono riusati
+        (come fa van_batch senza numba) i dettagli non vanno più letti.
+        """
+        # NB: _van_scenario (kernel di van_batch) replica questi calcoli su scalari:
+        # se cambia la logica qui sotto va aggiornato anche lui
         project_months = self.durata_progetto_anni * 12
 
         # Serie mensili allineate alla DURATA PROGETTO
-        rate_mensili = self._mappa_rate_su_mesi(amm["rata"], project_months)
-        interessi_mensili = self._allinea_serie_ammortamento_mensile(amm["interesse"], project_months)
-        capitale_mensile = self._allinea_serie_ammortamento_mensile(amm["capitale"], project_months)
-        # residuo è per periodo: allineiamo al mese e teniamo l'ultimo valore nel mese
-        residuo_mensile = self._allinea_serie_ammortamento_mensile(amm["residuo"], project_months)
+        pag_per_anno, durata_prestito = self.pagamenti_per_anno, self.durata_prestito_anni
+        rate_mensili = self._mappa_rate_su_mesi(amm["rata"], project_months, pag_per_anno, durata_prestito)
+
+        # le altre serie del piano vengono allineate solo se richieste, con gli input
+        # fissati ora (anche se l'oggetto viene modificato nel frattempo)
+        serie_piano_mensili = partial(
+            self._serie_piano_mensili, amm, project_months, pag_per_anno, durata_prestito)
 
         # Affitti su tutta la vita del progetto
-        affitti = [self.affitto_mensile_stimato] * project_months
+        affitti = np.full(project_months, self.affitto_mensile_stimato, dtype=np.float64)
 
         # Flusso pre-tasse: affitto - pagamento finanziamento
-        cf_lordo_tasse = [affitti[i] - rate_mensili[i] for i in range(project_months)]
+        cf_lordo_tasse = affitti - rate_mensili
 
         # Tasse a fine anno (timeline progetto)
         tasse = self._calcola_tasse_annuali(cf_lordo_tasse)
 
-        # Cash flow netto
-        cf_netto = [cf_lordo_tasse[i] + tasse[i] for i in range(project_months)]
-
-        # Inserisco l'esborso iniziale dell'equity al mese 0 (tempo 0)
-        cf_con_equity = [-self.equity_iniziale] + cf_netto
-
-        # Salva internamente
-        self.cashflow_mensile = cf_con_equity
-        self.dettagli_prestito = {
-            "ammortamento_per_periodo": amm,
-            "rate_mensili": rate_mensili,
-            "interessi_mensili": interessi_mensili,
-            "capitale_mensile": capitale_mensile,
-            "residuo_mensile": residuo_mensile,
-            "affitti_mensili": affitti,
-            "pre_tasse_mensile": cf_lordo_tasse,
-            "tasse_mensili": tasse,
-            "durata_progetto_mesi": project_months,
-        }
-        return self.cashflow_mensile, self.dettagli_prestito
+        # Cash flow netto, con l'esborso iniziale dell'equity al mese 0 (tempo 0):
+        # scritto direttamente nel buffer finale, senza array intermedi
+        cf_con_equity = np.empty(project_months + 1)
+        cf_con_equity[0] = -self.equity_iniziale
+        np.add(cf_lordo_tasse, tasse, out=cf_con_equity[1:])
+
+        dettagli = _DettagliLazy(
+            {
+                "ammortamento_per_periodo": amm,
+                "rate_mensili": rate_mensili,
+                "affitti_mensili": affitti,
+                "pre_tasse_mensile": cf_lordo_tasse,
+                "tasse_mensili": tasse,
+                "durata_progetto_mesi": project_months,
+            },
+            dict.fromkeys(("interessi_mensili", "capitale_mensile", "residuo_mensile"), serie_piano_mensili),
+        )
+        return cf_con_equity, dettagli
 
     def VAN(self) -> float:
         """
@@ -237,30 +530,34 @@ class ProgettoImmobiliare:
         con il tasso di attualizzazione annuo fornito.
         Considera la durata del PROGETTO.
         """
-        if not self.cashflow_mensile:
-            self.calcola_flussi()
+        self.calcola_flussi()  # no-op se gli input non sono cambiati
+        return self._van(self.cashflow_mensile)
 
+    def _van(self, cashflow_mensile: np.ndarray) -> float:
+        """VAN di una serie di flussi mensili (mese 0 incluso) al tasso di attualizzazione."""
         if self.tasso_attualizzazione_annuo < -0.9999:
             raise ValueError("Tasso di attualizzazione annuo non valido")
 
         # tasso mensile equivalente
         rm = (1 + self.tasso_attualizzazione_annuo)**(1/12) - 1
 
-        van = 0.0
-        for t, cf in enumerate(self.cashflow_mensile):
-            van += cf / ((1 + rm)**t)
-        return van
+        cf = np.asarray(cashflow_mensile, dtype=np.float64)
+        # fattori di sconto 1/(1+rm)^t come prodotto cumulato (una moltiplicazione per mese)
+        sconto = np.empty(cf.size)
+        sconto[0] = 1.0
+        sconto[1:] = 1.0 / (1.0 + rm)
+        np.cumprod(sconto, out=sconto)
+        return float(cf @ sconto)
 
     def riassunto(self) -> Dict[str, Any]:
         """
         Ritorna un riassunto utile per reporting.
         """
-        if not self.cashflow_mensile:
-            self.calcola_flussi()
+        self.calcola_flussi()  # no-op se gli input non sono cambiati
 
-        totale_affitti = sum(self.dettagli_prestito["affitti_mensili"])
-        totale_rate = sum(self.dettagli_prestito["rate_mensili"])
-        totale_tasse = sum(self.dettagli_prestito["tasse_mensili"])
+        totale_affitti = float(np.sum(self.dettagli_prestito["affitti_mensili"]))
+        totale_rate = float(np.sum(self.dettagli_prestito["rate_mensili"]))
+        totale_tasse = float(np.sum(self.dettagli_prestito["tasse_mensili"]))
         van = self.VAN()
 
         return {
@@ -273,6 +570,94 @@ class ProgettoImmobiliare:
             "durata_prestito_mesi": self.durata_prestito_anni * 12,
         }
 
+    # --- SCENARI ---
+    @classmethod
+    def van_batch(cls, prezzo_appartamento, quota_mutuo, tasso_annuo_mutuo, affitto_mensile_stimato,
+                  aliquota_tasse, durata_prestito_anni, *, durata_progetto_anni=None,
+                  modalita_prestito: LoanMode = "rata_fissa", pagamenti_per_anno=12,
+                  tasso_attualizzazione_annuo=None, tasso_annuo_mutuo_pct=None,
+                  aliquota_tasse_pct=None, tasso_attualizzazione_annuo_pct=None) -> np.ndarray:
+        """
+        VAN di molti scenari in una volta sola (analisi di sensitività / Monte Carlo).
+        Gli argomenti sono quelli del costruttore (inclusi i campi `*_pct`), come scalari
+        o array con broadcasting NumPy; quelli dopo durata_prestito_anni vanno passati per nome.
+        Ritorna un array con il VAN di ciascuno scenario.
+        Con numba il calcolo avviene in un kernel compilato, in parallelo sugli scenari;
+        senza numba si ripiega su un'istanza per scenario.
+        """
+        if modalita_prestito not in ("rata_fissa", "quota_capitale_fissa"):
+            raise ValueError(f"Modalità prestito non riconosciuta: {modalita_prestito}")
+        if durata_progetto_anni is None:
+            durata_progetto_anni = durata_prestito_anni
+
+        # stessa normalizzazione dei tassi di __post_init__
+        tasso_annuo_mutuo = _to_decimal_rate(
+            "tasso_annuo_mutuo", tasso_annuo_mutuo, tasso_annuo_mutuo_pct, massimo=1.0)
+        aliquota_tasse = _to_decimal_rate(
+            "aliquota_tasse", aliquota_tasse, aliquota_tasse_pct, massimo=1.0)
+        tasso_attualizzazione_annuo = _to_decimal_rate(
+            "tasso_attualizzazione_annuo", tasso_attualizzazione_annuo,
+            tasso_attualizzazione_annuo_pct, default=0.0, massimo=1.0)
+
+        def intero(nome: str, valore) -> np.ndarray:
+            # come nel costruttore, durate e pagamenti devono essere interi:
+            # il cast a int64 troncherebbe in silenzio (20.5 → 20)
+            x = np.asarray(valore, dtype=np.float64)
+            if np.any(~np.isfinite(x) | (x != np.floor(x))):
+                raise ValueError(f"{nome} deve contenere solo valori interi")
+            return x.astype(np.int64)
+
+        quota = np.asarray(quota_mutuo, dtype=np.float64)
+        args = np.broadcast_arrays(
+            np.asarray(prezzo_appartamento, dtype=np.float64),
+            np.where(quota > 1, quota / 100.0, quota),  # 80 → 0.8, come in __post_init__
+            np.asarray(tasso_annuo_mutuo, dtype=np.float64),
+            np.asarray(affitto_mensile_stimato, dtype=np.float64),
+            np.asarray(aliquota_tasse, dtype=np.float64),
+            intero("durata_prestito_anni", durata_prestito_anni),
+            intero("durata_progetto_anni", durata_progetto_anni),
+            np.asarray(tasso_attualizzazione_annuo, dtype=np.float64),
+            intero("pagamenti_per_anno", pagamenti_per_anno),
+        )
+        prezzo, quota, tasso, affitto, aliquota, d_prestito, d_progetto, tasso_att, pag = args
+
+        if np.any(pag < 1):
+            raise ValueError("pagamenti_per_anno deve essere almeno 1")
+        if np.any(d_prestito < 1):
+            raise ValueError("durata_prestito_anni deve essere almeno 1")
+        if np.any(d_progetto < 1):
+            raise ValueError("durata_progetto_anni deve essere almeno 1")
+        if np.any(tasso_att < -0.9999):
+            raise ValueError("Tasso di attualizzazione annuo non valido")
+
+        gufunc = _gufunc_van_batch()
+        if gufunc is not None:
+            return np.asarray(gufunc(*args, modalita_prestito == "quota_capitale_fissa"))
+
+        # senza numba: un'istanza per scenario, ma i buffer del piano di ammortamento
+        # vengono allocati una volta per ogni numero di periodi e riusati
+        buffer_piano: Dict[int, Dict[str, np.ndarray]] = {}
+        van = np.empty(prezzo.shape)
+        for i in np.ndindex(van.shape):
+            progetto = cls(
+                prezzo_appartamento=float(prezzo[i]),
+                quota_mutuo=float(quota[i]),
+                tasso_annuo_mutuo=float(tasso[i]),
+                affitto_mensile_stimato=float(affitto[i]),
+                aliquota_tasse=float(aliquota[i]),
+                durata_prestito_anni=int(d_prestito[i]),
+                durata_progetto_anni=int(d_progetto[i]),
+                modalita_prestito=modalita_prestito,
+                pagamenti_per_anno=int(pag[i]),
+                tasso_attualizzazione_annuo=float(tasso_att[i]),
+            )
+            n = progetto.durata_prestito_anni * progetto.pagamenti_per_anno
+            if n not in buffer_piano:
+                buffer_piano[n] = {k: np.empty(n, dtype=np.float64) for k in _CHIAVI_PIANO}
+            cf, _ = progetto._flussi(progetto._ammortamento(out=buffer_piano[n]))
+            van[i] = progetto._van(cf)
+        return van
+
     # --- UTILS ---
     def dataframe(self):
         """
@@ -283,34 +668,23 @@ class ProgettoImmobiliare:
         if pd is None:
             raise RuntimeError("pandas non disponibile nell'ambiente corrente")
 
-        if not self.cashflow_mensile:
-            self.calcola_flussi()
+        self.calcola_flussi()  # no-op se gli input non sono cambiati
 
         det = self.dettagli_prestito
         mesi = det["durata_progetto_mesi"]
-        records = []
-        # mese 0: equity
-        records.append({
-            "mese": 0,
-            "affitto": 0.0,
-            "rata": 0.0,
-            "interessi": 0.0,
-            "capitale": 0.0,
-            "residuo": self.ammontare_mutuo,
-            "tasse": 0.0,
-            "pre_tasse": 0.0,
-            "cf_netto": -self.equity_iniziale,
+
+        def con_mese_0(serie: np.ndarray, valore_0: float = 0.0) -> np.ndarray:
+            # antepone la riga del mese 0 (esborso iniziale) alla serie mensile
+            return np.concatenate(([valore_0], serie))
+
+        return pd.DataFrame({
+            "mese": np.arange(mesi + 1),
+            "affitto": con_mese_0(det["affitti_mensili"]),
+            "rata": con_mese_0(det["rate_mensili"]),
+            "interessi": con_mese_0(det["interessi_mensili"]),
+            "capitale": con_mese_0(det["capitale_mensile"]),
+            "residuo": con_mese_0(np.maximum(0.0, det["residuo_mensile"]), self.ammontare_mutuo),
+            "tasse": con_mese_0(det["tasse_mensili"]),  # negativa a dicembre
+            "pre_tasse": con_mese_0(det["pre_tasse_mensile"]),
+            "cf_netto": self.cashflow_mensile,  # include già -equity al mese 0
         })
-        for i in range(mesi):
-            records.append({
-                "mese": i+1,
-                "affitto": det["affitti_mensili"][i],
-                "rata": det["rate_mensili"][i],
-                "interessi": det["interessi_mensili"][i],
-                "capitale": det["capitale_mensile"][i],
-                "residuo": max(0.0, det["residuo_mensile"][i]),
-                "tasse": det["tasse_mensili"][i],  # negativa a dicembre
-                "pre_tasse": det["pre_tasse_mensile"][i],
-                "cf_netto": self.cashflow_mensile[i+1],
-            })
-        return pd.DataFrame.from_records(records)